@@ -3,25 +3,51 @@ import base64
 import json
 import os
 import tempfile
+import time
 from urllib.parse import parse_qs, quote, urlparse
 from urllib.request import urlopen
 from datetime import datetime
 
+import pandas as pd
 import streamlit as st
 from streamlit_player import st_player, _SUPPORTED_EVENTS
 from st_quill_dark_mode import st_quill_dark_mode
 
 from main.db import (
-    DB_FILE,
+    sqlite_path,
     init_db,
-    get_all_notebooks,
+    list_notebooks,
+    touch_notebook,
     create_notebook,
     update_title,
     update_notes,
     delete_notebook,
     get_notebook_by_id,
     import_notebooks_from_db,
+    export_notebooks_to_db,
+    get_notebook_anchors,
+    search_anchors,
+    get_collections,
+    get_collection_ancestors,
+    create_collection,
+    delete_collection,
+    move_notebooks,
+    get_tags,
+    get_notebook_tags,
+    add_tags,
+    remove_tags,
+    set_notebook_tags,
+    PROGRESS_SAMPLE_SECONDS,
+    record_progress_event,
+    rollup_progress_events,
+    get_daily_progress,
+    get_notebook_durations,
+    get_video_duration,
+    save_video_duration,
 )
+from main.analytics import compute_library_stats
+from main.anchors import build_anchor_html, format_timestamp, parse_timestamp
+from main.notes import content_hash
 from main.export import export
 
 # --- YouTube helpers ---
@@ -65,8 +91,18 @@ def fetch_youtube_title(url: str) -> str | None:
     except Exception:
         return None
 
-# Initialize DB on first run
-init_db()
+# Initialize / migrate the DB once per process, not on every rerun
+@st.cache_resource
+def prepare_database() -> None:
+    init_db()
+
+
+prepare_database()
+
+# Roll finished days of progress events up once per session
+if "progress_rolled_up" not in st.session_state:
+    rollup_progress_events()
+    st.session_state["progress_rolled_up"] = True
 
 @st.dialog("Confirm Deletion", on_dismiss='rerun')
 def verify_deletion(selected_notebook_id):
@@ -74,6 +110,7 @@ def verify_deletion(selected_notebook_id):
     confirmation = st.text_input("Type 'DELETE' to confirm:", autocomplete="off")
     if confirmation == "DELETE":
         delete_notebook(selected_notebook_id)
+        st.session_state.pop("selected_notebook_id", None)
         st.rerun()
     return None
 
@@ -98,6 +135,43 @@ def rename_notebook_dialog(selected_notebook_id: int, current_title: str) -> Non
         if st.button("Cancel", key=f"cancel_rename_{selected_notebook_id}", use_container_width=True):
             st.rerun()
 
+def seek_player(notebook_id: int, seconds: int) -> None:
+    """Remount the player of `notebook_id` so it starts at `seconds`."""
+    st.session_state[f"seek_{notebook_id}"] = int(seconds)
+    rev_key = f"player_rev_{notebook_id}"
+    st.session_state[rev_key] = st.session_state.get(rev_key, 0) + 1
+
+
+def open_moment(notebook_id: int, seconds: int) -> None:
+    """Switch to a notebook from the moment search and seek its player."""
+    st.session_state["menu_mode"] = "Open Notebook"
+    st.session_state["selected_notebook_id"] = notebook_id
+    seek_player(notebook_id, seconds)
+
+
+# --- Library list helpers ---
+PAGE_SIZE = 50
+
+# Window used by the "moments near the current position" filter
+NEARBY_SECONDS = 120
+
+SORT_LABELS = {
+    "created": "Newest first",
+    "last_opened": "Recently opened",
+    "progress": "Most watched",
+    "title": "Title (A-Z)",
+}
+
+
+def reset_pagination() -> None:
+    """Go back to the first page when filters or sorting change."""
+    st.session_state["page_cursors"] = [None]
+
+
+def parse_tags(raw: str) -> list[str]:
+    return [tag for tag in (raw or "").split(",") if tag.strip()]
+
+
 # --- 2. Streamlit UI Config ---
 st.set_page_config(layout="wide", page_icon=":notebook:", page_title="Video Notebook Manager")
 
@@ -108,25 +182,104 @@ with st.sidebar:
     # Mode Selection
     mode = st.radio(
         "Menu",
-        ["Open Notebook", "Create New", "Import / Export data"],
+        ["Open Notebook", "Create New", "Organize", "Search Moments", "Analytics", "Import / Export data"],
         label_visibility="collapsed",
+        key="menu_mode",
     )
     
     st.divider()
 
     selected_notebook_id = None
-    
-  
-    # Only load and show notebooks list when not in import/export mode
-    if mode != "Import / Export data":
-        df = get_all_notebooks()
-        if not df.empty:
-            # Create a dictionary for the selectbox: {Title: ID}
-            notebook_options = dict(zip(df['title'], df['id']))
-            selected_title = st.selectbox(
-                "Select a Notebook:", list(notebook_options.keys())
+    page = None
+    collections = get_collections()
+    collection_labels = {int(cid): path for cid, path in zip(collections["id"], collections["path"])}
+
+    # Only load and show notebooks list in the modes that use it
+    if mode not in ("Import / Export data", "Search Moments", "Analytics"):
+        tags = get_tags()
+        tag_labels = {int(tid): name for tid, name in zip(tags["id"], tags["name"])}
+
+        # Filtering, sorting and paging all happen in the database; only the
+        # current page of notebooks is loaded
+        filter_search = st.text_input(
+            "Search",
+            placeholder="Title or notes",
+            key="filter_search",
+            on_change=reset_pagination,
+        )
+        filter_collection = st.selectbox(
+            "Collection",
+            [None, *collection_labels],
+            format_func=lambda cid: "All notebooks" if cid is None else collection_labels[cid],
+            key="filter_collection",
+            on_change=reset_pagination,
+        )
+        filter_tag = st.selectbox(
+            "Tag",
+            [None, *tag_labels],
+            format_func=lambda tid: "Any tag" if tid is None else tag_labels[tid],
+            key="filter_tag",
+            on_change=reset_pagination,
+        )
+        sort = st.selectbox(
+            "Sort by",
+            list(SORT_LABELS),
+            format_func=SORT_LABELS.get,
+            key="filter_sort",
+            on_change=reset_pagination,
+        )
+
+        cursors = st.session_state.setdefault("page_cursors", [None])
+        page, next_cursor = list_notebooks(
+            filter_collection,
+            filter_tag,
+            filter_search,
+            sort,
+            after=cursors[-1],
+            limit=PAGE_SIZE,
+        )
+
+        if not page.empty:
+            page_titles = {int(nid): title for nid, title in zip(page["id"], page["title"])}
+            page_ids = list(page_titles)
+            current_id = st.session_state.get("selected_notebook_id")
+            index = 0
+            if current_id in page_ids:
+                index = page_ids.index(current_id)
+            elif current_id is not None:
+                # Keep a notebook opened from elsewhere (e.g. search) selected,
+                # unless another session has deleted it meanwhile
+                try:
+                    get_notebook_by_id(current_id)
+                    index = None
+                except ValueError:
+                    st.session_state.pop("selected_notebook_id", None)
+            choice = st.selectbox(
+                "Select a Notebook:",
+                page_ids,
+                index=index,
+                format_func=page_titles.get,
+                placeholder="Choose a notebook",
             )
-            selected_notebook_id = notebook_options[selected_title]
+            if choice is not None:
+                st.session_state["selected_notebook_id"] = choice
+            selected_notebook_id = st.session_state.get("selected_notebook_id")
+
+            prev_col, next_col = st.columns(2)
+            if prev_col.button("◀ Prev", disabled=len(cursors) == 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+            if next_col.button("Next ▶", disabled=next_cursor is None, use_container_width=True):
+                cursors.append(next_cursor)
+                st.rerun()
+            st.caption(f"Page {len(cursors)}")
+        elif (
+            filter_search.strip()
+            or filter_collection is not None
+            or filter_tag is not None
+            or len(cursors) > 1
+        ):
+            st.info("No notebooks match these filters.")
         else:
             st.info("No notebooks found. Create one or import from another DB.")
 
@@ -167,6 +320,11 @@ if mode == "Create New":
             placeholder="e.g., Python Course - Lecture 1",
             key="new_title",
         )
+        new_collection = st.selectbox(
+            "Collection",
+            [None, *collection_labels],
+            format_func=lambda cid: "No collection" if cid is None else collection_labels[cid],
+        )
         submitted = st.form_submit_button("Create Notebook")
 
         if submitted:
@@ -176,11 +334,187 @@ if mode == "Create New":
             elif not new_title or not new_title.strip():
                 st.error("Please enter a notebook title.")
             else:
-                create_notebook(new_title.strip(), normalized_url)
+                create_notebook(new_title.strip(), normalized_url, new_collection)
                 st.success(f"Created '{new_title.strip()}'!")
                 st.session_state["new_title_auto"] = ""
                 st.rerun()
 
+elif mode == "Search Moments":
+    st.header("⏱️ Search Moments")
+    st.write(
+        "Find timestamps you inserted into your notes, across every notebook."
+    )
+
+    query_col, from_col, to_col = st.columns([3, 1, 1])
+    moment_query = query_col.text_input(
+        "Search", placeholder="e.g. recursion", key="moment_query"
+    )
+    moment_from = from_col.text_input("From", placeholder="MM:SS", key="moment_from")
+    moment_to = to_col.text_input("To", placeholder="MM:SS", key="moment_to")
+
+    try:
+        start = parse_timestamp(moment_from) if moment_from.strip() else None
+        end = parse_timestamp(moment_to) if moment_to.strip() else None
+    except ValueError:
+        st.error("Enter times as SS, MM:SS or H:MM:SS.")
+        start = end = None
+    moments = search_anchors(moment_query, start, end)
+
+    if moments.empty:
+        st.info("No moments found. Use ⏱️ Insert timestamp while taking notes.")
+    else:
+        for i, row in enumerate(moments.itertuples(index=False)):
+            text_col, open_col = st.columns([6, 1], vertical_alignment="center")
+            text_col.markdown(
+                f"**{row.title}** · `{format_timestamp(row.seconds)}` {row.label}"
+            )
+            open_col.button(
+                "Open",
+                key=f"open_moment_{i}",
+                on_click=open_moment,
+                args=(int(row.notebook_id), int(row.seconds)),
+            )
+
+elif mode == "Organize":
+    st.header("🗂️ Organize")
+
+    collections_tab, bulk_tab = st.tabs(["Collections", "Bulk edit"])
+
+    # --- Collections Tab ---
+    with collections_tab:
+        with st.form("new_collection", clear_on_submit=True):
+            collection_name = st.text_input("New collection name")
+            parent_id = st.selectbox(
+                "Inside",
+                [None, *collection_labels],
+                format_func=lambda cid: "Top level" if cid is None else collection_labels[cid],
+            )
+            if st.form_submit_button("Create Collection"):
+                if collection_name and collection_name.strip():
+                    create_collection(collection_name.strip(), parent_id)
+                    st.rerun()
+                else:
+                    st.error("Please enter a collection name.")
+
+        if collection_labels:
+            doomed = st.selectbox(
+                "Delete a collection",
+                list(collection_labels),
+                format_func=collection_labels.get,
+                help="Its notebooks and sub-collections move up to its parent.",
+            )
+            if st.button("Delete Collection"):
+                delete_collection(doomed)
+                st.rerun()
+
+    # --- Bulk Edit Tab ---
+    with bulk_tab:
+        if page is None or page.empty:
+            st.info("No notebooks on the current page.")
+        else:
+            st.write(
+                "Apply changes to notebooks on the current sidebar page. "
+                "Use the sidebar filters to narrow the list first."
+            )
+            page_titles = {int(nid): title for nid, title in zip(page["id"], page["title"])}
+            select_all = st.checkbox("Select all on this page")
+            chosen_ids = st.multiselect(
+                "Notebooks",
+                list(page_titles),
+                default=list(page_titles) if select_all else [],
+                format_func=page_titles.get,
+            )
+
+            bulk_tags = st.text_input("Tags (comma separated)")
+            add_col, remove_col = st.columns(2)
+            if add_col.button("Add tags", disabled=not chosen_ids, use_container_width=True):
+                add_tags(chosen_ids, parse_tags(bulk_tags))
+                st.toast(f"Tagged {len(chosen_ids)} notebooks.")
+            if remove_col.button("Remove tags", disabled=not chosen_ids, use_container_width=True):
+                remove_tags(chosen_ids, parse_tags(bulk_tags))
+                st.toast(f"Updated {len(chosen_ids)} notebooks.")
+
+            target_collection = st.selectbox(
+                "Move to",
+                [None, *collection_labels],
+                format_func=lambda cid: "No collection" if cid is None else collection_labels[cid],
+            )
+            if st.button("Move", disabled=not chosen_ids):
+                move_notebooks(chosen_ids, target_collection)
+                st.toast(f"Moved {len(chosen_ids)} notebooks.")
+
+elif mode == "Analytics":
+    st.header("📈 Learning progress")
+
+    # Fold finished days of raw events into the daily table first
+    rollup_progress_events()
+    stats = compute_library_stats(
+        get_daily_progress(),
+        get_notebook_durations(),
+        collection_labels,
+        get_collection_ancestors(),
+    )
+    per_notebook = stats["notebooks"]
+    per_day = stats["days"]
+
+    if per_notebook.empty:
+        st.info("No notebooks yet. Watch a video to start tracking progress.")
+    else:
+        total_col, started_col, completed_col, percent_col = st.columns(4)
+        total_col.metric(
+            "Time watched", f"{per_notebook['seconds_watched'].sum() / 3600:.1f} h"
+        )
+        started_col.metric(
+            "Notebooks started", int((per_notebook["furthest_seconds"] > 0).sum())
+        )
+        completed_col.metric("Completed", int(per_notebook["completed"].sum()))
+        average = per_notebook["percent_watched"].mean()
+        percent_col.metric(
+            "Average watched", "—" if pd.isna(average) else f"{average:.0f}%"
+        )
+
+        st.subheader("Time spent per day")
+        if per_day.empty:
+            st.caption("No watch time recorded yet.")
+        else:
+            st.bar_chart(
+                (per_day["seconds_watched"] / 60).rename("Minutes watched")
+            )
+
+        st.subheader("Collections")
+        st.dataframe(
+            stats["collections"].assign(
+                hours_watched=lambda df: df["seconds_watched"] / 3600
+            )[["collection", "notebooks", "completed", "percent_watched", "hours_watched"]],
+            hide_index=True,
+            column_config={
+                "percent_watched": st.column_config.ProgressColumn(
+                    "Average watched", format="%.0f%%", min_value=0, max_value=100
+                ),
+                "hours_watched": st.column_config.NumberColumn("Hours watched", format="%.1f"),
+            },
+        )
+
+        st.subheader("Notebooks")
+        st.dataframe(
+            per_notebook.assign(
+                minutes_watched=lambda df: df["seconds_watched"] / 60
+            ).sort_values("percent_watched", ascending=False)[
+                ["title", "collection", "percent_watched", "minutes_watched", "completed"]
+            ],
+            hide_index=True,
+            column_config={
+                "percent_watched": st.column_config.ProgressColumn(
+                    "Watched", format="%.0f%%", min_value=0, max_value=100
+                ),
+                "minutes_watched": st.column_config.NumberColumn("Minutes watched", format="%.0f"),
+            },
+        )
+        st.caption(
+            "Percent watched needs the video length, which is saved the first "
+            "time a video is played in the app."
+        )
+
 elif mode == "Import / Export data":
     st.header("📥 Import / Export data")
 
@@ -251,14 +585,41 @@ elif mode == "Import / Export data":
             "You can later import this file into another instance of the app."
         )
 
-        if not os.path.exists(DB_FILE):
+        db_file = sqlite_path()
+        if db_file is None:
+            # Library lives on a database server: build a SQLite snapshot
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    delete=False, suffix=".db"
+                ) as tmp_file:
+                    tmp_path = tmp_file.name
+                export_notebooks_to_db(tmp_path)
+                with open(tmp_path, "rb") as f:
+                    db_bytes = f.read()
+            except Exception:
+                st.error("Could not build the database file for export.")
+            else:
+                st.download_button(
+                    "Download database file",
+                    data=db_bytes,
+                    file_name="notebooks.db",
+                    mime="application/octet-stream",
+                )
+            finally:
+                if tmp_path and os.path.exists(tmp_path):
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+        elif not os.path.exists(db_file):
             st.warning(
                 "The database file could not be found. "
                 "Try creating a notebook first and then refresh the page."
             )
         else:
             try:
-                with open(DB_FILE, "rb") as f:
+                with open(db_file, "rb") as f:
                     db_bytes = f.read()
             except OSError:
                 st.error("Could not read the database file for export.")
@@ -266,7 +627,7 @@ elif mode == "Import / Export data":
                 st.download_button(
                     "Download database file",
                     data=db_bytes,
-                    file_name=DB_FILE,
+                    file_name=os.path.basename(db_file),
                     mime="application/octet-stream",
                 )
 
@@ -274,6 +635,11 @@ elif mode == "Open Notebook" and selected_notebook_id:
     # Fetch current notebook data
     current_data = get_notebook_by_id(selected_notebook_id)
 
+    # Record the open once per selection, not on every player rerun
+    if st.session_state.get("last_touched_id") != selected_notebook_id:
+        touch_notebook(selected_notebook_id)
+        st.session_state["last_touched_id"] = selected_notebook_id
+
     # Header with large title, inline edit trigger, export and delete buttons
     header_left, header_export, header_delete = st.columns(
         [8, 1, 1], vertical_alignment="bottom"
@@ -300,37 +666,90 @@ elif mode == "Open Notebook" and selected_notebook_id:
         export(current_data)
     if header_delete.button("Delete Notebook", type="primary"):
         verify_deletion(selected_notebook_id)
-            
+
+    with st.expander("🏷️ Tags & collection"):
+        current_tags = get_notebook_tags(selected_notebook_id)
+        current_collection = current_data["collection_id"]
+        current_collection = None if pd.isna(current_collection) else int(current_collection)
+        collection_options = [None, *collection_labels]
+
+        with st.form(f"organize_{selected_notebook_id}"):
+            tags_input = st.text_input(
+                "Tags (comma separated)", value=", ".join(current_tags)
+            )
+            notebook_collection = st.selectbox(
+                "Collection",
+                collection_options,
+                index=collection_options.index(current_collection)
+                if current_collection in collection_options
+                else 0,
+                format_func=lambda cid: "No collection" if cid is None else collection_labels[cid],
+            )
+            if st.form_submit_button("Save"):
+                set_notebook_tags(selected_notebook_id, parse_tags(tags_input))
+                move_notebooks([selected_notebook_id], notebook_collection)
+                st.rerun()
+
     # Layout: Video (Left) vs Notes (Right)
     col_video, col_notes = st.columns([2, 1])
 
     with col_video:
         progressTimeSeconds = int(current_data['progress_time_seconds'])
+        # A requested seek (from a timestamp anchor) overrides saved progress
+        # for the one remount it triggered; later mounts use saved progress
+        startSeconds = st.session_state.pop(f"seek_{selected_notebook_id}", progressTimeSeconds)
+        player_rev = st.session_state.get(f"player_rev_{selected_notebook_id}", 0)
         video_url = normalize_youtube_url(current_data["video_url"]) or current_data["video_url"]
 
         options = {
-            "events": ["onProgress"],
+            "events": ["onProgress", "onDuration"],
             "progress_interval": 500,
             "height": 600,
             "playback_rate": 1.5,
             "config": {
                 "youtube": {
                     "playerVars": {
-                        "start": progressTimeSeconds
+                        "start": startSeconds
                     }
                 }
             }
         }
         
-        event = st_player(video_url, **options, key="youtube_player",)
-        playedSeconds = 0
+        # Changing the key remounts the player so a new start time takes effect
+        event = st_player(video_url, **options, key=f"youtube_player_{player_rev}",)
+        # The component only returns the latest event, so remember the last
+        # position for reruns triggered by other events
+        played_key = f"played_{selected_notebook_id}"
+        playedSeconds = st.session_state.get(played_key, 0)
         if event :
             (name, data) = event
-            playedSeconds = (data or {}).get("playedSeconds", 0)
+            if name == "onProgress":
+                playedSeconds = (data or {}).get("playedSeconds", 0)
+                st.session_state[played_key] = playedSeconds
+            elif name == "onDuration" and data:
+                duration_key = f"duration_saved_{video_url}"
+                if not st.session_state.get(duration_key):
+                    if get_video_duration(video_url) != int(round(data)):
+                        save_video_duration(video_url, data)
+                    st.session_state[duration_key] = True
+
+        # Sample playback for analytics while the position is advancing
+        sample_key = f"progress_sample_{selected_notebook_id}"
+        last_sample_ts, last_sample_pos = st.session_state.get(sample_key, (0, None))
+        now = time.time()
+        if (
+            now - last_sample_ts >= PROGRESS_SAMPLE_SECONDS
+            and int(playedSeconds) != last_sample_pos
+            and playedSeconds
+        ):
+            record_progress_event(selected_notebook_id, int(playedSeconds), int(now))
+            st.session_state[sample_key] = (now, int(playedSeconds))
 
     with col_notes:
 
         st.subheader("Notes")
+        editor_rev_key = f"editor_rev_{selected_notebook_id}"
+        editor_rev = st.session_state.get(editor_rev_key, 0)
         # Constrain notes area height using a scrollable container
         with st.container(height=520, border=False):
             # Quill rich-text editor for notes
@@ -338,7 +757,7 @@ elif mode == "Open Notebook" and selected_notebook_id:
                 value=current_data["notes"] or "",
                 html=True,
                 placeholder="Write your notes here...",
-                key=f"notes_{selected_notebook_id}",  # Unique key forces reset when switching notebooks
+                key=f"notes_{selected_notebook_id}_{editor_rev}",  # Unique key forces reset when switching notebooks
             )
 
             # Fallback in case the component returns None before first interaction
@@ -346,13 +765,51 @@ elif mode == "Open Notebook" and selected_notebook_id:
                 notes_input = current_data["notes"] or ""
             
 
+        save_col, stamp_col = st.columns(2)
+
         # Save Button (Manual Trigger)
-        if st.button("Save Notes"):
+        if save_col.button("Save Notes"):
             update_notes(selected_notebook_id, notes_input, playedSeconds)
             st.toast("Notes saved successfully!")
 
+        # Append an anchor for the current playback position, then reload
+        # the editor (new key) so it shows the updated notes
+        if stamp_col.button("⏱️ Insert timestamp"):
+            update_notes(
+                selected_notebook_id,
+                notes_input + build_anchor_html(int(playedSeconds)),
+                playedSeconds,
+            )
+            st.session_state[editor_rev_key] = editor_rev + 1
+            st.rerun()
+
+        with st.expander("⏱️ Moments"):
+            # Range query on the (notebook_id, seconds) index
+            nearby_only = st.toggle(
+                f"Only within {NEARBY_SECONDS // 60} min of the current position",
+                key=f"nearby_moments_{selected_notebook_id}",
+            )
+            if nearby_only:
+                anchors = get_notebook_anchors(
+                    selected_notebook_id,
+                    max(int(playedSeconds) - NEARBY_SECONDS, 0),
+                    int(playedSeconds) + NEARBY_SECONDS,
+                )
+            else:
+                anchors = get_notebook_anchors(selected_notebook_id)
+
+            if anchors.empty:
+                st.caption("No moments yet. Use ⏱️ Insert timestamp while taking notes.")
+            for i, row in enumerate(anchors.itertuples(index=False)):
+                st.button(
+                    f"{format_timestamp(row.seconds)} {row.label}".strip(),
+                    key=f"seek_btn_{selected_notebook_id}_{i}",
+                    on_click=seek_player,
+                    args=(selected_notebook_id, int(row.seconds)),
+                    type="tertiary",
+                )
+
         # --- Autosave every 1 minute ---
-        import time
         autosave_key = f"autosave_last_{selected_notebook_id}"
         now = time.time()
         last_autosave = st.session_state.get(autosave_key, 0)
@@ -362,8 +819,8 @@ elif mode == "Open Notebook" and selected_notebook_id:
             st.session_state[autosave_key] = now
             st.toast("Notes autosaved.", icon="💾")
 
-        # Auto-save logic: Check if session state differs from DB (existing logic)
-        if notes_input != current_data['notes']:
+        # Auto-save logic: compare against the hash stored with the processed notes
+        if content_hash(notes_input) != current_data['notes_hash']:
             update_notes(selected_notebook_id, notes_input, playedSeconds)
 
 else:
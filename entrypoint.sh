@@ -5,11 +5,16 @@ APP_DIR="/app"
 
 cd "${APP_DIR}"
 
+EXTRAS=()
+if [ "${NOTEBOOKS_DB_BACKEND:-sqlite}" = "postgres" ]; then
+  EXTRAS=(--extra postgres)
+fi
+
 echo "Installing/updating dependencies with uv..."
 if [ -f "uv.lock" ]; then
-  uv sync --frozen --no-dev || uv sync --no-dev
+  uv sync --frozen --no-dev "${EXTRAS[@]}" || uv sync --no-dev "${EXTRAS[@]}"
 else
-  uv sync --no-dev
+  uv sync --no-dev "${EXTRAS[@]}"
 fi
 
 echo "Starting Streamlit app with uv..."
@@ -0,0 +1,83 @@
+"""Library-wide watch statistics.
+
+The database returns pre-aggregated (notebook, day) rows (see
+`main.db.get_daily_progress`); everything here is vectorized pandas/NumPy
+over those frames, so the cost grows with notebooks × active days rather
+than with the number of raw progress events.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# A notebook counts as completed once this fraction of the video was reached
+COMPLETED_FRACTION = 0.9
+
+
+def compute_library_stats(
+    daily: pd.DataFrame,
+    notebooks: pd.DataFrame,
+    collection_labels: dict[int, str],
+    ancestors: pd.DataFrame,
+) -> dict[str, pd.DataFrame]:
+    """Build the per-notebook, per-day and per-collection tables.
+
+    `daily` has columns notebook_id, day, seconds_watched, max_position;
+    `notebooks` has notebook_id, title, collection_id, progress_time_seconds
+    and duration_seconds; `ancestors` maps each collection_id to every
+    ancestor_id (itself included), so a collection's stats cover its
+    sub-collections. Percentages are NaN when the duration is unknown.
+    """
+    daily = daily.apply(pd.to_numeric)
+    watched = daily.groupby("notebook_id").agg(
+        seconds_watched=("seconds_watched", "sum"),
+        max_position=("max_position", "max"),
+    )
+
+    per_notebook = notebooks.set_index("notebook_id").join(watched)
+    per_notebook["seconds_watched"] = per_notebook["seconds_watched"].fillna(0)
+
+    # Furthest point reached: saved progress or any sampled position
+    furthest = np.fmax(
+        pd.to_numeric(per_notebook["progress_time_seconds"]).to_numpy(dtype=float),
+        per_notebook["max_position"].to_numpy(dtype=float),
+    )
+    duration = pd.to_numeric(per_notebook["duration_seconds"]).to_numpy(dtype=float)
+    known = duration > 0
+    fraction = np.full(len(per_notebook), np.nan)
+    np.divide(furthest, duration, out=fraction, where=known)
+
+    per_notebook["furthest_seconds"] = np.nan_to_num(furthest)
+    per_notebook["percent_watched"] = np.clip(fraction, 0, 1) * 100
+    per_notebook["completed"] = fraction >= COMPLETED_FRACTION
+    per_notebook["collection"] = (
+        pd.to_numeric(per_notebook["collection_id"])
+        .map(collection_labels)
+        .fillna("No collection")
+    )
+
+    per_day = daily.groupby("day", as_index=False)["seconds_watched"].sum()
+    per_day["date"] = pd.to_datetime(per_day["day"] * 86400, unit="s")
+    per_day = per_day.set_index("date")[["seconds_watched"]].sort_index()
+
+    # One row per (notebook, collection containing it at any depth), plus
+    # notebooks outside any collection under "No collection"
+    ancestors = ancestors.astype(float)
+    notebook_rows = per_notebook.reset_index()
+    notebook_rows["collection_id"] = pd.to_numeric(notebook_rows["collection_id"]).astype(float)
+    in_collections = notebook_rows.merge(ancestors, on="collection_id")
+    in_collections["collection"] = in_collections["ancestor_id"].map(collection_labels)
+    unfiled = notebook_rows[notebook_rows["collection_id"].isna()]
+    memberships = pd.concat([in_collections, unfiled], ignore_index=True)
+    per_collection = memberships.groupby("collection").agg(
+        notebooks=("title", "size"),
+        completed=("completed", "sum"),
+        percent_watched=("percent_watched", "mean"),
+        seconds_watched=("seconds_watched", "sum"),
+    )
+
+    return {
+        "notebooks": per_notebook.reset_index(),
+        "days": per_day,
+        "collections": per_collection.reset_index(),
+    }
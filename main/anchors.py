@@ -0,0 +1,104 @@
+"""Timestamp anchors embedded in notebook notes.
+
+An anchor is a link of the form ``<a href="#t=SECONDS">[MM:SS]</a>`` inside
+the Quill HTML. Anchors are extracted when notes are saved and stored in the
+`note_anchors` table, so the app never needs to re-parse notes to find them.
+"""
+
+import re
+from html.parser import HTMLParser
+
+
+ANCHOR_HREF_RE = re.compile(r"^#t=(\d+)$")
+
+# Tags that end a line of text in Quill output
+_BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre", "div"}
+
+# Maximum length of the label stored alongside each anchor
+LABEL_MAX_LENGTH = 200
+
+
+def format_timestamp(seconds: int) -> str:
+    """Format seconds as `MM:SS`, or `H:MM:SS` past the hour."""
+    seconds = max(int(seconds), 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def parse_timestamp(text: str) -> int:
+    """Parse `SS`, `MM:SS` or `H:MM:SS` into seconds.
+
+    Raises ValueError if the text is not a timestamp.
+    """
+    parts = text.strip().split(":")
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Not a timestamp: {text!r}")
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def build_anchor_html(seconds: int) -> str:
+    """Return the HTML snippet for a new anchor at `seconds`."""
+    seconds = max(int(seconds), 0)
+    return f'<p><a href="#t={seconds}">[{format_timestamp(seconds)}]</a> </p>'
+
+
+class _AnchorParser(HTMLParser):
+    """Collect (seconds, label) pairs; the label is the rest of the anchor's line."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.anchors: list[tuple[int, str]] = []
+        self._pending: list[int] = []
+        self._line: list[str] = []
+        self._in_anchor = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a":
+            match = ANCHOR_HREF_RE.match(dict(attrs).get("href") or "")
+            if match:
+                self._pending.append(int(match.group(1)))
+                self._in_anchor = True
+        elif tag == "br":
+            self._flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a":
+            self._in_anchor = False
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        # Skip the "[MM:SS]" text of the anchor itself
+        if not self._in_anchor:
+            self._line.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _flush(self) -> None:
+        label = " ".join("".join(self._line).split())[:LABEL_MAX_LENGTH]
+        self.anchors.extend((seconds, label) for seconds in self._pending)
+        self._pending = []
+        self._line = []
+
+
+def extract_anchors(notes_html: str) -> list[tuple[int, str]]:
+    """Return `(seconds, label)` for every timestamp anchor in `notes_html`.
+
+    The label is the text on the same line as the anchor, which is what
+    library-wide search matches against.
+    """
+    if not notes_html or "#t=" not in notes_html:
+        return []
+
+    parser = _AnchorParser()
+    parser.feed(notes_html)
+    parser.close()
+    return parser.anchors
@@ -1,83 +1,458 @@
 import sqlite3
+import time
+from collections.abc import Sequence
 from typing import Any
 
 import pandas as pd
 
-
-DB_FILE = "notebooks.db"
+from main.anchors import extract_anchors
+from main.notes import content_hash, process_notes
+from main.storage import SQLiteBackend, get_backend
+
+
+# Sort keys accepted by `list_notebooks`: column and direction
+NOTEBOOK_SORTS = {
+    "created": ("created_at", "DESC"),
+    "last_opened": ("last_opened_at", "DESC"),
+    "progress": ("progress_time_seconds", "DESC"),
+    "title": ("title", "ASC"),
+}
+
+# Progress events are sampled at most this often while a video plays; a gap
+# longer than PROGRESS_MAX_GAP_SECONDS between samples is not counted as
+# watch time (paused, tab closed, ...)
+PROGRESS_SAMPLE_SECONDS = 10
+PROGRESS_MAX_GAP_SECONDS = 3 * PROGRESS_SAMPLE_SECONDS
+
+# Per (notebook, day) watch time and furthest position from raw events;
+# `{where}` optionally limits the events. `ts / 86400` is the UTC day number,
+# which works the same on every backend.
+_DAILY_FROM_EVENTS_SQL = """
+    SELECT notebook_id,
+           ts / 86400 AS day,
+           SUM(CASE WHEN dt <= ? AND dp > 0 THEN dt ELSE 0 END) AS seconds_watched,
+           MAX(position) AS max_position
+    FROM (
+        SELECT notebook_id, ts, position,
+               ts - LAG(ts) OVER (PARTITION BY notebook_id ORDER BY ts) AS dt,
+               position - LAG(position) OVER (PARTITION BY notebook_id ORDER BY ts) AS dp
+        FROM progress_events
+        {where}
+    ) deltas
+    GROUP BY notebook_id, ts / 86400
+"""
+
+# Columns returned by `list_notebooks`; notes are left out to keep pages light
+_LIST_COLUMNS = "n.id, n.title, n.video_url, n.collection_id, n.progress_time_seconds, n.created_at, n.last_opened_at"
+
+
+def sqlite_path() -> str | None:
+    """Return the SQLite file of the current backend.
+
+    `None` when the library lives on a database server instead.
+    """
+    backend = get_backend()
+    return backend.path if isinstance(backend, SQLiteBackend) else None
 
 
 def init_db() -> None:
-    """Initialize the database table if it doesn't exist."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS notebooks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            video_url TEXT,
-            notes TEXT,
-            progress_time_seconds INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """Create or migrate the schema and backfill derived columns.
+
+    Call once per process (the app caches it), not on every rerun. Runs in
+    one transaction under a migration lock, so replicas starting together
+    cannot race each other.
+    """
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.lock_migrations(conn)
+        backend.execute(
+            conn,
+            f"""
+            CREATE TABLE IF NOT EXISTS notebooks (
+                id {backend.id_column},
+                title TEXT NOT NULL,
+                video_url TEXT,
+                notes TEXT,
+                progress_time_seconds INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+        # Timestamp anchors extracted from notes on save (see main.anchors)
+        backend.execute(
+            conn,
+            f"""
+            CREATE TABLE IF NOT EXISTS note_anchors (
+                id {backend.id_column},
+                notebook_id INTEGER NOT NULL,
+                seconds INTEGER NOT NULL,
+                label TEXT NOT NULL DEFAULT ''
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            "CREATE INDEX IF NOT EXISTS idx_note_anchors_notebook_seconds "
+            "ON note_anchors (notebook_id, seconds)",
+        )
+        # Library-wide seconds ranges (see `search_anchors`)
+        backend.execute(
+            conn,
+            "CREATE INDEX IF NOT EXISTS idx_note_anchors_seconds "
+            "ON note_anchors (seconds, notebook_id)",
+        )
+
+        # Collections form a tree through `parent_id` (NULL for top level)
+        backend.execute(
+            conn,
+            f"""
+            CREATE TABLE IF NOT EXISTS collections (
+                id {backend.id_column},
+                name TEXT NOT NULL,
+                parent_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            "CREATE INDEX IF NOT EXISTS idx_collections_parent_name "
+            "ON collections (parent_id, name)",
+        )
+        backend.execute(
+            conn,
+            f"""
+            CREATE TABLE IF NOT EXISTS tags (
+                id {backend.id_column},
+                name TEXT NOT NULL UNIQUE
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS notebook_tags (
+                notebook_id INTEGER NOT NULL,
+                tag_id INTEGER NOT NULL,
+                PRIMARY KEY (tag_id, notebook_id)
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            "CREATE INDEX IF NOT EXISTS idx_notebook_tags_notebook "
+            "ON notebook_tags (notebook_id, tag_id)",
         )
+
+        # Append-only playback samples, periodically folded into
+        # progress_daily by `rollup_progress_events`
+        backend.execute(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS progress_events (
+                notebook_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                position INTEGER NOT NULL
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            "CREATE INDEX IF NOT EXISTS idx_progress_events_notebook_ts "
+            "ON progress_events (notebook_id, ts)",
+        )
+        backend.execute(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS progress_daily (
+                notebook_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                seconds_watched INTEGER NOT NULL DEFAULT 0,
+                max_position INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (notebook_id, day)
+            )
+            """,
+        )
+        backend.execute(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                video_url TEXT PRIMARY KEY,
+                duration_seconds INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+
+        # Columns added after the first release
+        _add_column_if_missing(conn, "notebooks", "collection_id", "INTEGER")
+        _add_column_if_missing(conn, "notebooks", "last_opened_at", "TIMESTAMP")
+        _backfill_last_opened(conn)
+
+        # Derived forms of `notes`, maintained by `update_notes` (see main.notes)
+        _add_column_if_missing(conn, "notebooks", "notes_html", "TEXT")
+        _add_column_if_missing(conn, "notebooks", "notes_text", "TEXT")
+        _add_column_if_missing(conn, "notebooks", "notes_markdown", "TEXT")
+        _add_column_if_missing(conn, "notebooks", "notes_word_count", "INTEGER DEFAULT 0")
+        _add_column_if_missing(conn, "notebooks", "notes_hash", "TEXT")
+        _backfill_processed_notes(conn)
+
+        # One (sort column, id) index per sort key, with and without the
+        # collection prefix, so filtered keyset pages are index range scans
+        for column, _ in NOTEBOOK_SORTS.values():
+            backend.execute(
+                conn,
+                f"CREATE INDEX IF NOT EXISTS idx_notebooks_{column} "
+                f"ON notebooks ({column}, id)",
+            )
+            backend.execute(
+                conn,
+                f"CREATE INDEX IF NOT EXISTS idx_notebooks_collection_{column} "
+                f"ON notebooks (collection_id, {column}, id)",
+            )
+
+
+def _add_column_if_missing(conn: Any, table: str, column: str, ddl: str) -> None:
+    get_backend().add_column(conn, table, column, ddl)
+
+
+def _backfill_last_opened(conn: Any) -> None:
+    """Give rows without `last_opened_at` (old or imported ones) a value.
+
+    Keeping the column non-NULL lets keyset pagination compare it directly.
+    """
+    get_backend().execute(
+        conn,
+        "UPDATE notebooks SET last_opened_at = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        "WHERE last_opened_at IS NULL",
+    )
+
+
+def _backfill_processed_notes(conn: Any) -> None:
+    """Process notes of rows saved before the derived columns existed."""
+    backend = get_backend()
+    rows = backend.execute(
+        conn,
+        "SELECT id, notes FROM notebooks WHERE notes_hash IS NULL OR notes_html IS NULL",
+    ).fetchall()
+    for notebook_id, notes in rows:
+        _store_processed_notes(conn, notebook_id, notes)
+
+
+def _store_processed_notes(conn: Any, notebook_id: int, raw_notes: str | None) -> None:
+    """Save raw notes with the pipeline's output and anchors for one notebook.
+
+    The raw HTML is kept as written; only the derived columns hold the
+    sanitized form.
+    """
+    processed = process_notes(raw_notes)
+    get_backend().execute(
+        conn,
         """
+        UPDATE notebooks
+        SET notes = ?, notes_html = ?, notes_text = ?, notes_markdown = ?,
+            notes_word_count = ?, notes_hash = ?
+        WHERE id = ?
+        """,
+        (
+            raw_notes or "",
+            processed.html,
+            processed.text,
+            processed.markdown,
+            processed.word_count,
+            processed.content_hash,
+            notebook_id,
+        ),
     )
-    conn.commit()
-    conn.close()
+    _replace_anchors(conn, notebook_id, processed.html)
 
 
 def get_all_notebooks() -> pd.DataFrame:
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query(
-        "SELECT * FROM notebooks ORDER BY created_at DESC", conn
-    )
-    conn.close()
-    return df
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(
+            conn, "SELECT * FROM notebooks ORDER BY created_at DESC"
+        )
 
 
-def create_notebook(title: str, url: str) -> int:
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO notebooks (title, video_url, notes, progress_time_seconds) VALUES (?, ?, ?, ?)",
-        (title, url, "", 0),
-    )
-    conn.commit()
-    notebook_id = c.lastrowid
-    conn.close()
-    return int(notebook_id)
+def create_notebook(title: str, url: str, collection_id: int | None = None) -> int:
+    backend = get_backend()
+    with backend.connect() as conn:
+        notebook_id = backend.insert_returning_id(
+            conn,
+            """
+            INSERT INTO notebooks (
+                title, video_url, notes, progress_time_seconds, collection_id,
+                last_opened_at, notes_html, notes_text, notes_markdown,
+                notes_word_count, notes_hash
+            )
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?)
+            """,
+            (title, url, "", 0, collection_id, "", "", "", 0, content_hash("")),
+        )
+    return notebook_id
+
+
+def _cursor_value(value: Any) -> Any:
+    """Convert a pandas/NumPy scalar into a plain Python value for a query."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+
+def _like_pattern(text: str) -> str:
+    """Case-insensitive substring pattern for `LIKE ? ESCAPE '\\'`.
+
+    Escapes the LIKE wildcards so `%` and `_` in user input match literally.
+    """
+    escaped = text.strip().lower()
+    for char in ("\\", "%", "_"):
+        escaped = escaped.replace(char, "\\" + char)
+    return f"%{escaped}%"
+
+
+def list_notebooks(
+    collection_id: int | None = None,
+    tag_id: int | None = None,
+    search: str = "",
+    sort: str = "created",
+    after: tuple[Any, int] | None = None,
+    limit: int = 50,
+) -> tuple[pd.DataFrame, tuple[Any, int] | None]:
+    """Return one page of notebooks, filtered and sorted in the database.
+
+    Pages use keyset pagination: `after` is the cursor returned with the
+    previous page, i.e. the (sort value, id) of its last row. Filtering by
+    `collection_id` includes its nested collections; `search` matches the
+    title or the plain-text notes case-insensitively.
+
+    Returns `(page, next_cursor)`; `next_cursor` is None on the last page.
+    """
+    if sort not in NOTEBOOK_SORTS:
+        raise ValueError(f"Unknown sort: {sort!r}")
+    column, direction = NOTEBOOK_SORTS[sort]
+    comparison = "<" if direction == "DESC" else ">"
+
+    query = ""
+    params: list[Any] = []
+    if collection_id is not None:
+        query += """
+            WITH RECURSIVE subtree(id) AS (
+                SELECT CAST(? AS INTEGER)
+                UNION ALL
+                SELECT c.id FROM collections c JOIN subtree s ON c.parent_id = s.id
+            )
+        """
+        params.append(int(collection_id))
+
+    query += f"SELECT {_LIST_COLUMNS} FROM notebooks n"
+    if tag_id is not None:
+        query += " JOIN notebook_tags nt ON nt.notebook_id = n.id AND nt.tag_id = ?"
+        params.append(int(tag_id))
+
+    conditions = []
+    if collection_id is not None:
+        conditions.append("n.collection_id IN (SELECT id FROM subtree)")
+    if search.strip():
+        conditions.append(
+            "(LOWER(n.title) LIKE ? ESCAPE '\\' OR LOWER(n.notes_text) LIKE ? ESCAPE '\\')"
+        )
+        pattern = _like_pattern(search)
+        params.extend([pattern, pattern])
+    if after is not None:
+        conditions.append(f"(n.{column}, n.id) {comparison} (?, ?)")
+        params.extend(_cursor_value(v) for v in after)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    # Fetch one extra row to know whether another page follows
+    query += f" ORDER BY n.{column} {direction}, n.id {direction} LIMIT ?"
+    params.append(int(limit) + 1)
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        df = backend.read_sql(conn, query, params)
+
+    if len(df) <= limit:
+        return df, None
+    df = df.iloc[:limit]
+    last = df.iloc[-1]
+    return df, (_cursor_value(last[column]), int(last["id"]))
+
+
+def touch_notebook(notebook_id: int) -> None:
+    """Record that a notebook was opened (used by the "last opened" sort)."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn,
+            "UPDATE notebooks SET last_opened_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (notebook_id,),
+        )
 
 
 def update_title(notebook_id: int, new_title: str) -> None:
     """Update the title of a notebook."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "UPDATE notebooks SET title = ? WHERE id = ?",
-        (new_title, notebook_id),
-    )
-    conn.commit()
-    conn.close()
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn,
+            "UPDATE notebooks SET title = ? WHERE id = ?",
+            (new_title, notebook_id),
+        )
 
 
 def update_notes(notebook_id: int, new_notes: str, progress_time_seconds: int = 0) -> None:
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "UPDATE notebooks SET notes = ?, progress_time_seconds = ? WHERE id = ?",
-        (new_notes, progress_time_seconds, notebook_id),
+    """Save progress and, if the notes changed, the processed notes and anchors.
+
+    Change detection compares `content_hash(new_notes)` with the stored
+    `notes_hash`, so saving unchanged notes only updates the progress.
+    """
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn,
+            "UPDATE notebooks SET progress_time_seconds = ? WHERE id = ?",
+            (progress_time_seconds, notebook_id),
+        )
+        row = backend.execute(
+            conn, "SELECT notes_hash FROM notebooks WHERE id = ?", (notebook_id,)
+        ).fetchone()
+        if row is not None and row[0] != content_hash(new_notes):
+            _store_processed_notes(conn, notebook_id, new_notes)
+
+
+def _replace_anchors(conn: Any, notebook_id: int, notes_html: str | None) -> None:
+    """Rewrite the `note_anchors` rows of one notebook from its notes HTML."""
+    backend = get_backend()
+    backend.execute(
+        conn, "DELETE FROM note_anchors WHERE notebook_id = ?", (notebook_id,)
     )
-    conn.commit()
-    conn.close()
+    anchors = extract_anchors(notes_html or "")
+    if anchors:
+        backend.executemany(
+            conn,
+            "INSERT INTO note_anchors (notebook_id, seconds, label) VALUES (?, ?, ?)",
+            [(notebook_id, seconds, label) for seconds, label in anchors],
+        )
 
 
 def delete_notebook(notebook_id: int) -> None:
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM notebooks WHERE id = ?", (notebook_id,))
-    conn.commit()
-    conn.close()
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn, "DELETE FROM note_anchors WHERE notebook_id = ?", (notebook_id,)
+        )
+        backend.execute(
+            conn, "DELETE FROM notebook_tags WHERE notebook_id = ?", (notebook_id,)
+        )
+        backend.execute(
+            conn, "DELETE FROM progress_events WHERE notebook_id = ?", (notebook_id,)
+        )
+        backend.execute(
+            conn, "DELETE FROM progress_daily WHERE notebook_id = ?", (notebook_id,)
+        )
+        backend.execute(conn, "DELETE FROM notebooks WHERE id = ?", (notebook_id,))
 
 
 def get_notebook_by_id(notebook_id: int) -> pd.Series:
@@ -85,13 +460,13 @@ def get_notebook_by_id(notebook_id: int) -> pd.Series:
 
     Raises ValueError if the notebook does not exist.
     """
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query(
-        "SELECT * FROM notebooks WHERE id = ?",
-        conn,
-        params=(notebook_id,),
-    )
-    conn.close()
+    backend = get_backend()
+    with backend.connect() as conn:
+        df = backend.read_sql(
+            conn,
+            "SELECT * FROM notebooks WHERE id = ?",
+            (notebook_id,),
+        )
 
     if df.empty:
         raise ValueError(f"Notebook with id {notebook_id} not found")
@@ -100,6 +475,363 @@ def get_notebook_by_id(notebook_id: int) -> pd.Series:
     return df.iloc[0]
 
 
+def get_notebook_anchors(
+    notebook_id: int,
+    start_seconds: int | None = None,
+    end_seconds: int | None = None,
+) -> pd.DataFrame:
+    """Return a notebook's timestamp anchors ordered by time.
+
+    `start_seconds` / `end_seconds` (inclusive) restrict the result to a
+    range, served by the (notebook_id, seconds) index.
+    """
+    query = "SELECT seconds, label FROM note_anchors WHERE notebook_id = ?"
+    params: list[Any] = [notebook_id]
+    if start_seconds is not None:
+        query += " AND seconds >= ?"
+        params.append(int(start_seconds))
+    if end_seconds is not None:
+        query += " AND seconds <= ?"
+        params.append(int(end_seconds))
+    query += " ORDER BY seconds"
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(conn, query, params)
+
+
+def search_anchors(
+    text: str = "",
+    start_seconds: int | None = None,
+    end_seconds: int | None = None,
+    limit: int = 100,
+) -> pd.DataFrame:
+    """List timestamp anchors across the whole library, ordered by time.
+
+    `start_seconds` / `end_seconds` (inclusive) select a range of video time
+    and are served by the (seconds, notebook_id) index, which also yields
+    the result order. `text` matches anchor labels case-insensitively; that
+    is a substring filter, so it scans the anchors within the range. Each row
+    carries the notebook id, title and video URL so results can be opened
+    directly.
+    """
+    query = """
+        SELECT a.notebook_id, n.title, n.video_url, a.seconds, a.label
+        FROM note_anchors a
+        JOIN notebooks n ON n.id = a.notebook_id
+    """
+    conditions = []
+    params: list[Any] = []
+    if start_seconds is not None:
+        conditions.append("a.seconds >= ?")
+        params.append(int(start_seconds))
+    if end_seconds is not None:
+        conditions.append("a.seconds <= ?")
+        params.append(int(end_seconds))
+    if text.strip():
+        conditions.append("LOWER(a.label) LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(text))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY a.seconds, a.notebook_id LIMIT ?"
+    params.append(int(limit))
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(conn, query, params)
+
+
+def get_collections() -> pd.DataFrame:
+    """Return all collections with their full path, e.g. "Courses / Python"."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(
+            conn,
+            """
+            WITH RECURSIVE tree(id, name, parent_id, path) AS (
+                SELECT id, name, parent_id, name
+                FROM collections WHERE parent_id IS NULL
+                UNION ALL
+                SELECT c.id, c.name, c.parent_id, t.path || ' / ' || c.name
+                FROM collections c JOIN tree t ON c.parent_id = t.id
+            )
+            SELECT id, name, parent_id, path FROM tree ORDER BY path
+            """,
+        )
+
+
+def get_collection_ancestors() -> pd.DataFrame:
+    """Return (collection_id, ancestor_id) for every collection and each of
+    its ancestors, including the collection itself."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(
+            conn,
+            """
+            WITH RECURSIVE ancestry(collection_id, ancestor_id, parent_id) AS (
+                SELECT id, id, parent_id FROM collections
+                UNION ALL
+                SELECT a.collection_id, c.id, c.parent_id
+                FROM ancestry a JOIN collections c ON c.id = a.parent_id
+            )
+            SELECT collection_id, ancestor_id FROM ancestry
+            """,
+        )
+
+
+def create_collection(name: str, parent_id: int | None = None) -> int:
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.insert_returning_id(
+            conn,
+            "INSERT INTO collections (name, parent_id) VALUES (?, ?)",
+            (name, parent_id),
+        )
+
+
+def delete_collection(collection_id: int) -> None:
+    """Delete a collection, handing its notebooks and children to its parent."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        row = backend.execute(
+            conn, "SELECT parent_id FROM collections WHERE id = ?", (collection_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Collection with id {collection_id} not found")
+        parent_id = row[0]
+
+        backend.execute(
+            conn,
+            "UPDATE notebooks SET collection_id = ? WHERE collection_id = ?",
+            (parent_id, collection_id),
+        )
+        backend.execute(
+            conn,
+            "UPDATE collections SET parent_id = ? WHERE parent_id = ?",
+            (parent_id, collection_id),
+        )
+        backend.execute(conn, "DELETE FROM collections WHERE id = ?", (collection_id,))
+
+
+def move_notebooks(notebook_ids: Sequence[int], collection_id: int | None) -> None:
+    """Move notebooks into a collection (None for no collection) in one transaction."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.executemany(
+            conn,
+            "UPDATE notebooks SET collection_id = ? WHERE id = ?",
+            [(collection_id, int(nid)) for nid in notebook_ids],
+        )
+
+
+def get_tags() -> pd.DataFrame:
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(conn, "SELECT id, name FROM tags ORDER BY name")
+
+
+def get_notebook_tags(notebook_id: int) -> list[str]:
+    backend = get_backend()
+    with backend.connect() as conn:
+        rows = backend.execute(
+            conn,
+            """
+            SELECT t.name FROM notebook_tags nt
+            JOIN tags t ON t.id = nt.tag_id
+            WHERE nt.notebook_id = ?
+            ORDER BY t.name
+            """,
+            (notebook_id,),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _normalize_tag_names(tag_names: Sequence[str]) -> list[str]:
+    return sorted({name.strip().lower() for name in tag_names if name.strip()})
+
+
+def _tag_ids(conn: Any, tag_names: Sequence[str], create: bool) -> list[int]:
+    backend = get_backend()
+    if create:
+        backend.executemany(
+            conn,
+            "INSERT INTO tags (name) VALUES (?) ON CONFLICT (name) DO NOTHING",
+            [(name,) for name in tag_names],
+        )
+    placeholders = ", ".join("?" for _ in tag_names)
+    rows = backend.execute(
+        conn, f"SELECT id FROM tags WHERE name IN ({placeholders})", tag_names
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def add_tags(notebook_ids: Sequence[int], tag_names: Sequence[str]) -> None:
+    """Tag every notebook with every tag (created if needed) in one transaction."""
+    names = _normalize_tag_names(tag_names)
+    if not names or not notebook_ids:
+        return
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        tag_ids = _tag_ids(conn, names, create=True)
+        backend.executemany(
+            conn,
+            "INSERT INTO notebook_tags (notebook_id, tag_id) VALUES (?, ?) "
+            "ON CONFLICT DO NOTHING",
+            [(int(nid), tid) for nid in notebook_ids for tid in tag_ids],
+        )
+
+
+def remove_tags(notebook_ids: Sequence[int], tag_names: Sequence[str]) -> None:
+    """Remove tags from every notebook in one transaction."""
+    names = _normalize_tag_names(tag_names)
+    if not names or not notebook_ids:
+        return
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        tag_ids = _tag_ids(conn, names, create=False)
+        backend.executemany(
+            conn,
+            "DELETE FROM notebook_tags WHERE notebook_id = ? AND tag_id = ?",
+            [(int(nid), tid) for nid in notebook_ids for tid in tag_ids],
+        )
+
+
+def set_notebook_tags(notebook_id: int, tag_names: Sequence[str]) -> None:
+    """Replace the tags of a single notebook."""
+    names = _normalize_tag_names(tag_names)
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn, "DELETE FROM notebook_tags WHERE notebook_id = ?", (notebook_id,)
+        )
+        if names:
+            backend.executemany(
+                conn,
+                "INSERT INTO notebook_tags (notebook_id, tag_id) VALUES (?, ?)",
+                [(notebook_id, tid) for tid in _tag_ids(conn, names, create=True)],
+            )
+
+
+def record_progress_event(notebook_id: int, position_seconds: int, ts: int | None = None) -> None:
+    """Append one playback sample (position at wall-clock time `ts`)."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn,
+            "INSERT INTO progress_events (notebook_id, ts, position) VALUES (?, ?, ?)",
+            (notebook_id, int(time.time() if ts is None else ts), int(position_seconds)),
+        )
+
+
+def rollup_progress_events(before_ts: int | None = None) -> int:
+    """Fold events older than `before_ts` into `progress_daily` and drop them.
+
+    Defaults to the start of the current UTC day, so only today's events
+    stay in the raw table. Runs in a single transaction and returns the
+    number of events rolled up. The first sample after the cut-off has no
+    predecessor, so at most one sampling interval per session is lost.
+    """
+    if before_ts is None:
+        before_ts = int(time.time()) // 86400 * 86400
+
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.lock_table(conn, "progress_daily")
+        count = backend.execute(
+            conn, "SELECT COUNT(*) FROM progress_events WHERE ts < ?", (before_ts,)
+        ).fetchone()[0]
+        if not count:
+            return 0
+
+        backend.execute(
+            conn,
+            f"""
+            INSERT INTO progress_daily (notebook_id, day, seconds_watched, max_position)
+            SELECT notebook_id, day, seconds_watched, max_position
+            FROM ({_DAILY_FROM_EVENTS_SQL.format(where="WHERE ts < ?")}) rolled
+            WHERE true
+            ON CONFLICT (notebook_id, day) DO UPDATE SET
+                seconds_watched = progress_daily.seconds_watched + excluded.seconds_watched,
+                max_position = CASE
+                    WHEN excluded.max_position > progress_daily.max_position
+                    THEN excluded.max_position
+                    ELSE progress_daily.max_position
+                END
+            """,
+            (PROGRESS_MAX_GAP_SECONDS, before_ts),
+        )
+        backend.execute(
+            conn, "DELETE FROM progress_events WHERE ts < ?", (before_ts,)
+        )
+    return int(count)
+
+
+def get_daily_progress() -> pd.DataFrame:
+    """Return watch time and furthest position per (notebook_id, day).
+
+    Rolled-up days are combined with the raw events not rolled up yet in one
+    query; `day` is the UTC day number (days since 1970-01-01).
+    """
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(
+            conn,
+            f"""
+            SELECT notebook_id, day, seconds_watched, max_position
+            FROM progress_daily
+            UNION ALL
+            SELECT notebook_id, day, seconds_watched, max_position
+            FROM ({_DAILY_FROM_EVENTS_SQL.format(where="")}) live
+            """,
+            (PROGRESS_MAX_GAP_SECONDS,),
+        )
+
+
+def get_notebook_durations() -> pd.DataFrame:
+    """Return every notebook with its cached video duration (if known)."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        return backend.read_sql(
+            conn,
+            """
+            SELECT n.id AS notebook_id, n.title, n.collection_id,
+                   n.progress_time_seconds, m.duration_seconds
+            FROM notebooks n
+            LEFT JOIN video_metadata m ON m.video_url = n.video_url
+            """,
+        )
+
+
+def get_video_duration(video_url: str) -> int | None:
+    backend = get_backend()
+    with backend.connect() as conn:
+        row = backend.execute(
+            conn,
+            "SELECT duration_seconds FROM video_metadata WHERE video_url = ?",
+            (video_url,),
+        ).fetchone()
+    return None if row is None or row[0] is None else int(row[0])
+
+
+def save_video_duration(video_url: str, duration_seconds: float) -> None:
+    """Cache the duration reported by the player for a video."""
+    backend = get_backend()
+    with backend.connect() as conn:
+        backend.execute(
+            conn,
+            """
+            INSERT INTO video_metadata (video_url, duration_seconds, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (video_url) DO UPDATE SET
+                duration_seconds = excluded.duration_seconds,
+                updated_at = excluded.updated_at
+            """,
+            (video_url, int(round(duration_seconds))),
+        )
+
+
 def import_notebooks_from_db(external_db_path: str) -> dict[str, Any]:
     """Import/append notebooks from another SQLite database file.
 
@@ -173,12 +905,11 @@ def import_notebooks_from_db(external_db_path: str) -> dict[str, Any]:
         return {"imported": 0}
 
     # --- 2. Insert rows into local DB (append only) ---
-    dest_conn = sqlite3.connect(DB_FILE)
-    try:
-        dest_cursor = dest_conn.cursor()
-
+    backend = get_backend()
+    with backend.connect() as dest_conn:
         if has_created_at:
-            dest_cursor.executemany(
+            backend.executemany(
+                dest_conn,
                 """
                 INSERT INTO notebooks (
                     title,
@@ -197,7 +928,8 @@ def import_notebooks_from_db(external_db_path: str) -> dict[str, Any]:
                 (r[0], r[1], r[2], r[3])  # title, video_url, notes, progress_time_seconds
                 for r in rows
             ]
-            dest_cursor.executemany(
+            backend.executemany(
+                dest_conn,
                 """
                 INSERT INTO notebooks (
                     title,
@@ -210,8 +942,64 @@ def import_notebooks_from_db(external_db_path: str) -> dict[str, Any]:
                 trimmed_rows,
             )
 
+        # Process the imported notes (which also indexes their anchors)
+        _backfill_processed_notes(dest_conn)
+        _backfill_last_opened(dest_conn)
+
+    return {"imported": len(rows)}
+
+
+def export_notebooks_to_db(external_db_path: str) -> dict[str, Any]:
+    """Write a standalone SQLite copy of the `notebooks` table.
+
+    Used to export data when the library lives on a database server; the
+    resulting file can be imported with `import_notebooks_from_db`.
+
+    Returns a summary dict, e.g. {"exported": 5}.
+    """
+    df = get_all_notebooks()
+    rows = [
+        (
+            int(r.id),
+            r.title,
+            r.video_url,
+            r.notes,
+            int(r.progress_time_seconds or 0),
+            None if pd.isna(r.created_at) else str(r.created_at),
+        )
+        for r in df.itertuples(index=False)
+    ]
+
+    dest_conn = sqlite3.connect(external_db_path)
+    try:
+        dest_conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notebooks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                video_url TEXT,
+                notes TEXT,
+                progress_time_seconds INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        dest_conn.executemany(
+            """
+            INSERT INTO notebooks (
+                id,
+                title,
+                video_url,
+                notes,
+                progress_time_seconds,
+                created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
         dest_conn.commit()
     finally:
         dest_conn.close()
 
-    return {"imported": len(rows)}
+    return {"exported": len(rows)}
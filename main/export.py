@@ -5,7 +5,6 @@ from textwrap import dedent
 
 from docx import Document
 from htmldocx import HtmlToDocx
-from markdownify import markdownify as html_to_md
 import streamlit as st
 from weasyprint import HTML
 
@@ -29,7 +28,7 @@ def _build_html(notebook_data) -> str:
     """Build a simple HTML page for PDF export."""
     title = notebook_data["title"]
     video_url = notebook_data["video_url"] or ""
-    notes_html = notebook_data["notes"] or ""
+    notes_html = notebook_data["notes_html"] or ""
 
     html = f"""
     <html>
@@ -71,7 +70,7 @@ def _export_dialog(notebook_data) -> None:
         document.add_paragraph(f"Video URL: {video_url}")
         document.add_paragraph("")  # blank line
 
-    notes_html = notebook_data["notes"] or ""
+    notes_html = notebook_data["notes_html"] or ""
     if notes_html:
         document.add_paragraph("Notes:")
         parser = HtmlToDocx()
@@ -88,10 +87,10 @@ def _export_dialog(notebook_data) -> None:
     pdf_b64 = base64.b64encode(pdf_bytes).decode()
     pdf_name = f"{notebook_data['title'].replace(' ', '_')}.pdf"
 
-    # Build Markdown content
+    # Build Markdown content from the form precomputed when notes were saved
     title = notebook_data["title"]
     video_url = notebook_data["video_url"] or ""
-    notes_md = html_to_md(notes_html or "")
+    notes_md = notebook_data["notes_markdown"] or ""
     markdown_content = f"# {title}\n\nVideo URL: {video_url}\n\n## Notes\n\n{notes_md}\n"
     md_b64 = base64.b64encode(markdown_content.encode("utf-8")).decode()
     md_name = f"{notebook_data['title'].replace(' ', '_')}.md"
@@ -0,0 +1,191 @@
+"""Notes processing run once when notes are saved.
+
+The raw Quill HTML is sanitized and normalized, and the derived forms used
+elsewhere (sanitized HTML for export, plain text for search, Markdown, word
+count) are computed in the same pass. Results are cached next to the raw
+notes in the `notebooks` table and keyed by `content_hash` of the raw HTML,
+so unchanged notes are never processed twice.
+"""
+
+import hashlib
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+from markdownify import markdownify as html_to_md
+
+
+# Tags kept as-is; anything else is dropped but its text is kept
+ALLOWED_TAGS = {
+    "p", "br", "h1", "h2", "h3", "h4", "h5", "h6",
+    "strong", "b", "em", "i", "u", "s", "strike", "sub", "sup",
+    "a", "span", "code", "pre", "blockquote", "ol", "ul", "li", "img",
+}
+# Tags dropped together with everything inside them
+DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "noscript", "template"}
+VOID_TAGS = {"br", "img"}
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre"}
+
+ALLOWED_ATTRS = {"href", "target", "rel", "class", "style", "data-list", "src", "alt", "spellcheck"}
+URL_ATTRS = {"href", "src"}
+SAFE_URL_RE = re.compile(r"^(https?:|mailto:|#)", re.IGNORECASE)
+SAFE_IMAGE_RE = re.compile(r"^data:image/(png|jpe?g|gif|webp);", re.IGNORECASE)
+
+# Inline styles Quill emits; every other CSS property is dropped. Values are
+# limited to colors/keywords, so nothing like `url(...)` reaches the PDF renderer.
+ALLOWED_STYLES = {"color", "background-color", "text-align"}
+SAFE_STYLE_VALUE_RE = re.compile(r"^[#\w\s(),.%-]+$")
+
+# Quill represents an empty line as an empty paragraph
+_EMPTY_BLOCKS_RE = r"(?:<p>(?:<br>)?</p>\s*)+"
+_LEADING_EMPTY_RE = re.compile(r"^\s*" + _EMPTY_BLOCKS_RE)
+_TRAILING_EMPTY_RE = re.compile(_EMPTY_BLOCKS_RE + r"$")
+
+
+class ProcessedNotes(NamedTuple):
+    html: str
+    text: str
+    markdown: str
+    word_count: int
+    content_hash: str
+
+
+def content_hash(raw_html: str | None) -> str:
+    """Hash of the notes exactly as received from the editor."""
+    return hashlib.sha256((raw_html or "").encode("utf-8")).hexdigest()
+
+
+class _NotesParser(HTMLParser):
+    """Rebuild whitelisted HTML and collect plain text in a single pass."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.html_parts: list[str] = []
+        self.lines: list[str] = []
+        self._line: list[str] = []
+        self._open: list[str] = []
+        self._dropping = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in DROPPED_TAGS:
+            self._dropping += 1
+            return
+        if self._dropping or tag not in ALLOWED_TAGS:
+            return
+        self._close_implied(tag)
+
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRS or value is None:
+                continue
+            if name in URL_ATTRS and not _is_safe_url(tag, name, value.strip()):
+                continue
+            if name == "style":
+                value = _safe_style(value)
+                if not value:
+                    continue
+            kept.append(f' {name}="{escape(value, quote=True)}"')
+        self.html_parts.append(f"<{tag}{''.join(kept)}>")
+
+        if tag in {"ol", "ul"} and "".join(self._line).strip():
+            # A nested list starts on its own line
+            self._end_line()
+        if tag == "br":
+            self._end_line()
+        elif tag not in VOID_TAGS:
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in DROPPED_TAGS:
+            # `<style/>` has no content and no end tag to balance `_dropping`
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and tag in self._open:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in DROPPED_TAGS:
+            self._dropping = max(self._dropping - 1, 0)
+            return
+        if self._dropping or tag not in self._open:
+            return
+
+        # Close any tags left open inside this one
+        while self._open:
+            open_tag = self._open.pop()
+            self.html_parts.append(f"</{open_tag}>")
+            if open_tag in BLOCK_TAGS:
+                self._end_line()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._dropping:
+            return
+        self.html_parts.append(escape(data, quote=False))
+        self._line.append(data)
+
+    def close(self) -> None:
+        super().close()
+        while self._open:
+            self.handle_endtag(self._open[-1])
+        self._end_line()
+
+    def _close_implied(self, tag: str) -> None:
+        """Close elements that HTML ends implicitly, e.g. `<p>a<p>b`."""
+        if (tag in BLOCK_TAGS or tag in {"ol", "ul"}) and "p" in self._open:
+            self.handle_endtag("p")
+        if tag == "li" and "li" in self._open:
+            last_list = max(
+                (i for i, t in enumerate(self._open) if t in {"ol", "ul"}), default=-1
+            )
+            if len(self._open) - 1 - self._open[::-1].index("li") > last_list:
+                self.handle_endtag("li")
+
+    def _end_line(self) -> None:
+        self.lines.append(" ".join("".join(self._line).split()))
+        self._line = []
+
+
+def _is_safe_url(tag: str, attr: str, value: str) -> bool:
+    if SAFE_URL_RE.match(value):
+        return True
+    return tag == "img" and attr == "src" and bool(SAFE_IMAGE_RE.match(value))
+
+
+def _safe_style(value: str) -> str:
+    """Keep only the allowed declarations of an inline style."""
+    kept = []
+    for declaration in value.split(";"):
+        prop, _, prop_value = declaration.partition(":")
+        prop, prop_value = prop.strip().lower(), prop_value.strip()
+        if (
+            prop in ALLOWED_STYLES
+            and SAFE_STYLE_VALUE_RE.match(prop_value)
+            and "url(" not in prop_value.lower()
+        ):
+            kept.append(f"{prop}: {prop_value}")
+    return "; ".join(kept)
+
+
+def process_notes(raw_html: str | None) -> ProcessedNotes:
+    """Sanitize notes HTML and derive the cached text, Markdown and counts."""
+    parser = _NotesParser()
+    parser.feed(raw_html or "")
+    parser.close()
+
+    html = "".join(parser.html_parts)
+    html = _LEADING_EMPTY_RE.sub("", html)
+    html = _TRAILING_EMPTY_RE.sub("", html).strip()
+
+    # Collapse runs of blank lines left by empty paragraphs
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(parser.lines)).strip()
+
+    return ProcessedNotes(
+        html=html,
+        text=text,
+        markdown=html_to_md(html).strip() if html else "",
+        word_count=len(text.split()),
+        content_hash=content_hash(raw_html),
+    )
@@ -0,0 +1,203 @@
+"""Storage backends used by `main.db`.
+
+SQLite is the default and needs no setup. A PostgreSQL backend with a
+connection pool can be selected for deployments where several app replicas
+write to the same library.
+
+Configuration is read from environment variables:
+
+- ``NOTEBOOKS_DB_BACKEND``: ``sqlite`` (default) or ``postgres``.
+- ``NOTEBOOKS_DB_PATH``: SQLite file path (default ``notebooks.db``).
+- ``NOTEBOOKS_DATABASE_URL``: PostgreSQL connection string
+  (falls back to ``DATABASE_URL``).
+- ``NOTEBOOKS_DB_POOL_MIN`` / ``NOTEBOOKS_DB_POOL_MAX``: pool size bounds.
+"""
+
+import os
+import sqlite3
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+import pandas as pd
+
+
+DEFAULT_DB_FILE = "notebooks.db"
+
+# Arbitrary key of the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_ID = 7_301_462
+
+
+class _BaseBackend:
+    """Helpers shared by all backends; subclasses provide `sql` and `connect`."""
+
+    def sql(self, query: str) -> str:
+        return query
+
+    def execute(self, conn: Any, query: str, params: Sequence[Any] = ()) -> Any:
+        """Execute a qmark-style query on an open connection."""
+        return conn.execute(self.sql(query), params)
+
+    def executemany(
+        self, conn: Any, query: str, rows: Sequence[Sequence[Any]]
+    ) -> None:
+        conn.cursor().executemany(self.sql(query), rows)
+
+    def read_sql(
+        self, conn: Any, query: str, params: Sequence[Any] = ()
+    ) -> pd.DataFrame:
+        """Run a SELECT on an open connection and return a DataFrame."""
+        cursor = self.execute(conn, query, params)
+        columns = [col[0] for col in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+class SQLiteBackend(_BaseBackend):
+    """Single-file backend; a fresh connection is opened per operation."""
+
+    name = "sqlite"
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, path: str = DEFAULT_DB_FILE) -> None:
+        self.path = path
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Yield a connection; commit on success, roll back on error."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def columns(self, conn: sqlite3.Connection, table: str) -> set[str]:
+        rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        return {row[1] for row in rows}
+
+    def insert_returning_id(
+        self, conn: sqlite3.Connection, query: str, params: Sequence[Any]
+    ) -> int:
+        cursor = self.execute(conn, query, params)
+        return int(cursor.lastrowid)
+
+    def lock_table(self, conn: sqlite3.Connection, table: str) -> None:
+        # SQLite already serializes writers on the whole database file
+        return None
+
+    def lock_migrations(self, conn: sqlite3.Connection) -> None:
+        """Take the write lock up front so schema checks and changes are atomic."""
+        conn.execute("BEGIN IMMEDIATE")
+
+    def add_column(self, conn: sqlite3.Connection, table: str, column: str, ddl: str) -> None:
+        if column not in self.columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+class PostgresBackend(_BaseBackend):
+    """PostgreSQL backend sharing a pool of connections across sessions.
+
+    Requires the optional ``psycopg[binary,pool]`` dependency
+    (``uv sync --extra postgres``).
+    """
+
+    name = "postgres"
+    id_column = "INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY"
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10) -> None:
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as exc:
+            raise RuntimeError(
+                "The postgres backend requires psycopg with the pool extra. "
+                "Install it with `uv sync --extra postgres`."
+            ) from exc
+
+        self.dsn = dsn
+        self.pool = ConnectionPool(
+            dsn, min_size=min_size, max_size=max_size, open=True
+        )
+
+    @contextmanager
+    def connect(self) -> Iterator[Any]:
+        """Borrow a pooled connection; the pool commits or rolls back on exit."""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def sql(self, query: str) -> str:
+        # Queries in `main.db` are written with qmark placeholders and no
+        # literal question marks, so a plain substitution is enough.
+        return query.replace("?", "%s")
+
+    def columns(self, conn: Any, table: str) -> set[str]:
+        rows = self.execute(
+            conn,
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ?",
+            (table,),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def insert_returning_id(
+        self, conn: Any, query: str, params: Sequence[Any]
+    ) -> int:
+        row = self.execute(conn, query + " RETURNING id", params).fetchone()
+        return int(row[0])
+
+    def lock_table(self, conn: Any, table: str) -> None:
+        """Block other writers of `table` until the transaction ends."""
+        conn.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+
+    def lock_migrations(self, conn: Any) -> None:
+        """Serialize schema changes of replicas starting at the same time."""
+        conn.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+
+    def add_column(self, conn: Any, table: str, column: str, ddl: str) -> None:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}")
+
+
+Backend = SQLiteBackend | PostgresBackend
+
+_backend: Backend | None = None
+
+
+def backend_from_env() -> Backend:
+    """Build the backend described by the environment variables."""
+    kind = os.environ.get("NOTEBOOKS_DB_BACKEND", "sqlite").strip().lower()
+
+    if kind == "sqlite":
+        return SQLiteBackend(os.environ.get("NOTEBOOKS_DB_PATH", DEFAULT_DB_FILE))
+
+    if kind in {"postgres", "postgresql"}:
+        dsn = os.environ.get("NOTEBOOKS_DATABASE_URL") or os.environ.get(
+            "DATABASE_URL"
+        )
+        if not dsn:
+            raise RuntimeError(
+                "NOTEBOOKS_DATABASE_URL must be set when using the postgres backend."
+            )
+        return PostgresBackend(
+            dsn,
+            min_size=int(os.environ.get("NOTEBOOKS_DB_POOL_MIN", "1")),
+            max_size=int(os.environ.get("NOTEBOOKS_DB_POOL_MAX", "10")),
+        )
+
+    raise RuntimeError(f"Unknown NOTEBOOKS_DB_BACKEND: {kind!r}")
+
+
+def get_backend() -> Backend:
+    """Return the process-wide backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = backend_from_env()
+    return _backend
+
+
+def set_backend(backend: Backend) -> None:
+    """Replace the process-wide backend (e.g. to point at another database)."""
+    global _backend
+    _backend = backend
+
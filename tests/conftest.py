@@ -0,0 +1,138 @@
+"""Backend fixtures shared by the conformance and benchmark tests.
+
+Every test using `db` runs once against a temporary SQLite file and once
+against PostgreSQL. For the PostgreSQL run a throwaway server is launched
+with the local ``initdb``/``pg_ctl`` (found on ``PATH``, via ``pg_config``,
+or in ``NOTEBOOKS_TEST_PG_BINDIR``) and stopped after the session. Set
+``NOTEBOOKS_TEST_DATABASE_URL`` to use an existing server instead, e.g. the
+compose ``postgres`` profile. The PostgreSQL cases are skipped only when
+neither is available. Each test gets its own throwaway schema, so any
+existing data in that database is left alone.
+"""
+
+import glob
+import os
+import shutil
+import subprocess
+import uuid
+from pathlib import Path
+
+import pytest
+
+from main import db as db_module
+from main import storage
+
+
+TEST_DSN_ENV = "NOTEBOOKS_TEST_DATABASE_URL"
+TEST_BINDIR_ENV = "NOTEBOOKS_TEST_PG_BINDIR"
+
+
+def _postgres_bindir() -> Path | None:
+    """Directory holding `initdb` and `pg_ctl`, or None if none is installed."""
+    candidates = []
+    if os.environ.get(TEST_BINDIR_ENV):
+        candidates.append(os.environ[TEST_BINDIR_ENV])
+    if shutil.which("pg_ctl"):
+        candidates.append(os.path.dirname(shutil.which("pg_ctl")))
+    if shutil.which("pg_config"):
+        result = subprocess.run(
+            ["pg_config", "--bindir"], capture_output=True, text=True
+        )
+        candidates.append(result.stdout.strip())
+    # Debian/Ubuntu keep the server binaries off PATH
+    candidates.extend(sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True))
+
+    for candidate in candidates:
+        bindir = Path(candidate)
+        if (bindir / "initdb").exists() and (bindir / "pg_ctl").exists():
+            return bindir
+    return None
+
+
+@pytest.fixture(scope="session")
+def postgres_dsn(tmp_path_factory):
+    """Connection string of a PostgreSQL server for the whole test session."""
+    dsn = os.environ.get(TEST_DSN_ENV)
+    if dsn:
+        yield dsn
+        return
+
+    bindir = _postgres_bindir()
+    if bindir is None:
+        pytest.skip(f"no PostgreSQL server binaries found and {TEST_DSN_ENV} is not set")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip(f"initdb cannot run as root; set {TEST_DSN_ENV} instead")
+
+    base = tmp_path_factory.mktemp("postgres")
+    data, log = base / "data", base / "server.log"
+    # Listen on a Unix socket in the temporary directory only, so the
+    # server cannot clash with one already running on this machine
+    options = f"-c listen_addresses='' -k {base} -c fsync=off"
+    try:
+        subprocess.run(
+            [bindir / "initdb", "-D", data, "-U", "postgres", "-A", "trust", "--no-sync"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [bindir / "pg_ctl", "-D", data, "-l", log, "-o", options, "-w", "start"],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as exc:
+        pytest.skip(f"could not launch a PostgreSQL server: {exc}")
+
+    try:
+        yield f"postgresql://postgres@/postgres?host={base}"
+    finally:
+        subprocess.run(
+            [bindir / "pg_ctl", "-D", data, "-m", "immediate", "stop"],
+            capture_output=True,
+        )
+
+
+def _postgres_backend(dsn):
+    psycopg = pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+    from psycopg.conninfo import make_conninfo
+
+    schema = f"notebooks_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}")
+
+    backend = storage.PostgresBackend(
+        make_conninfo(dsn, options=f"-c search_path={schema}"), max_size=4
+    )
+    try:
+        yield backend
+    finally:
+        backend.pool.close()
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def backend(request, tmp_path):
+    """A fresh, empty backend installed as the process-wide one."""
+    if request.param == "sqlite":
+        backends = iter([storage.SQLiteBackend(str(tmp_path / "notebooks.db"))])
+    else:
+        # Requested lazily so SQLite-only runs never launch a server
+        backends = _postgres_backend(request.getfixturevalue("postgres_dsn"))
+
+    previous = storage._backend
+    current = next(backends)
+    storage.set_backend(current)
+    try:
+        yield current
+    finally:
+        storage.set_backend(previous)
+        # Runs the PostgreSQL generator's cleanup
+        next(backends, None)
+
+
+@pytest.fixture
+def db(backend):
+    """`main.db` with the schema created on the test backend."""
+    db_module.init_db()
+    return db_module
@@ -0,0 +1,214 @@
+"""Conformance tests for `main.db`, run against every storage backend."""
+
+import sqlite3
+
+import pytest
+
+from main.analytics import compute_library_stats
+
+
+DAY = 86400
+
+
+def test_init_db_is_idempotent(db, backend):
+    db.init_db()
+    with backend.connect() as conn:
+        columns = backend.columns(conn, "notebooks")
+    assert {"collection_id", "last_opened_at", "notes_html", "notes_hash"} <= columns
+
+
+def test_sqlite_path_follows_backend(db, backend):
+    expected = backend.path if backend.name == "sqlite" else None
+    assert db.sqlite_path() == expected
+
+
+def test_notebook_crud(db):
+    notebook_id = db.create_notebook("Lecture 1", "https://www.youtube.com/watch?v=a")
+    assert isinstance(notebook_id, int)
+
+    db.update_title(notebook_id, "Lecture one")
+    db.update_notes(notebook_id, "<p>Hello <b>world</b></p>", 42)
+
+    row = db.get_notebook_by_id(notebook_id)
+    assert row["title"] == "Lecture one"
+    assert row["notes"] == "<p>Hello <b>world</b></p>"
+    assert row["notes_text"] == "Hello world"
+    assert row["notes_markdown"] == "Hello **world**"
+    assert int(row["notes_word_count"]) == 2
+    assert int(row["progress_time_seconds"]) == 42
+    assert len(db.get_all_notebooks()) == 1
+
+    db.delete_notebook(notebook_id)
+    with pytest.raises(ValueError):
+        db.get_notebook_by_id(notebook_id)
+
+
+def test_unchanged_notes_only_update_progress(db):
+    notebook_id = db.create_notebook("a", "u")
+    db.update_notes(notebook_id, "<p>x</p>", 5)
+    notes_hash = db.get_notebook_by_id(notebook_id)["notes_hash"]
+
+    db.update_notes(notebook_id, "<p>x</p>", 9)
+    row = db.get_notebook_by_id(notebook_id)
+    assert row["notes_hash"] == notes_hash
+    assert int(row["progress_time_seconds"]) == 9
+
+
+def test_anchors_are_indexed_on_save(db):
+    notebook_id = db.create_notebook("a", "u")
+    db.update_notes(
+        notebook_id,
+        '<p><a href="#t=30">[00:30]</a> intro</p>'
+        '<p><a href="#t=300">[05:00]</a> Recursion</p>',
+    )
+
+    anchors = db.get_notebook_anchors(notebook_id)
+    assert anchors.values.tolist() == [[30, "intro"], [300, "Recursion"]]
+    assert db.get_notebook_anchors(notebook_id, 100, 400)["seconds"].tolist() == [300]
+    assert db.search_anchors("recursion")["seconds"].tolist() == [300]
+    assert db.search_anchors(start_seconds=0, end_seconds=60)["label"].tolist() == ["intro"]
+    assert db.search_anchors("%").empty
+
+    db.delete_notebook(notebook_id)
+    assert db.search_anchors().empty
+
+
+def test_export_then_import_round_trip(db, tmp_path):
+    notebook_id = db.create_notebook("a", "u")
+    db.update_notes(notebook_id, '<p><a href="#t=7">[00:07]</a> start</p>', 3)
+
+    export_path = str(tmp_path / "export.db")
+    assert db.export_notebooks_to_db(export_path) == {"exported": 1}
+    assert db.import_notebooks_from_db(export_path) == {"imported": 1}
+
+    notebooks = db.get_all_notebooks()
+    assert len(notebooks) == 2
+    assert notebooks["last_opened_at"].notna().all()
+    assert notebooks["notes_hash"].notna().all()
+    assert len(db.search_anchors("start")) == 2
+
+
+def test_import_rejects_unusable_files(db, tmp_path):
+    path = tmp_path / "other.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE notebooks (title TEXT)")
+    conn.close()
+
+    with pytest.raises(ValueError, match="missing required columns"):
+        db.import_notebooks_from_db(str(path))
+
+
+def test_tags_and_collections(db):
+    courses = db.create_collection("Courses")
+    python = db.create_collection("Python", courses)
+    ids = [db.create_notebook(f"n{i}", "u", python) for i in range(4)]
+
+    assert db.get_collections()["path"].tolist() == ["Courses", "Courses / Python"]
+
+    db.add_tags(ids, ["ML", " ml ", "cs"])
+    db.remove_tags(ids[:2], ["cs"])
+    db.set_notebook_tags(ids[3], ["solo"])
+    assert db.get_tags()["name"].tolist() == ["cs", "ml", "solo"]
+    assert db.get_notebook_tags(ids[2]) == ["cs", "ml"]
+    assert db.get_notebook_tags(ids[3]) == ["solo"]
+
+    # Filtering by a parent collection includes its sub-collections
+    page, _ = db.list_notebooks(collection_id=courses)
+    assert sorted(page["id"]) == sorted(ids)
+
+    db.move_notebooks(ids[:2], None)
+    db.delete_collection(python)
+    assert db.get_collections()["path"].tolist() == ["Courses"]
+    page, _ = db.list_notebooks(collection_id=courses)
+    assert sorted(page["id"]) == sorted(ids[2:])
+
+
+@pytest.mark.parametrize("sort", ["created", "last_opened", "progress", "title"])
+def test_keyset_pagination_visits_every_notebook_once(db, sort):
+    tagged = []
+    for i in range(23):
+        notebook_id = db.create_notebook(f"nb{i:02d}", "u")
+        db.update_notes(notebook_id, "", i * 10)
+        if i % 3 == 0:
+            tagged.append(notebook_id)
+    db.add_tags(tagged, ["even"])
+    tag_id = int(db.get_tags()["id"].iloc[0])
+
+    for tag, expected in ((None, 23), (tag_id, len(tagged))):
+        seen, cursor = [], None
+        while True:
+            page, cursor = db.list_notebooks(
+                tag_id=tag, sort=sort, after=cursor, limit=5
+            )
+            seen.extend(page["id"].tolist())
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == expected
+
+
+def test_search_matches_title_and_note_text(db):
+    first = db.create_notebook("Graphs", "u")
+    second = db.create_notebook("Other", "u")
+    db.update_notes(second, "<p>Dijkstra on GRAPHS</p>")
+
+    page, _ = db.list_notebooks(search="graphs")
+    assert sorted(page["id"]) == sorted([first, second])
+    assert db.list_notebooks(search="nothing")[0].empty
+
+
+@pytest.mark.parametrize("search", ["%", "_", "\\"])
+def test_search_wildcards_match_literally(db, search):
+    db.create_notebook("plain", "u")
+    literal = db.create_notebook(f"50{search} off", "u")
+
+    page, _ = db.list_notebooks(search=search)
+    assert page["id"].tolist() == [literal]
+
+
+def test_progress_rollup(db):
+    notebook_id = db.create_notebook("a", "u")
+    yesterday = 20_000 * DAY
+    for i in range(10):
+        db.record_progress_event(notebook_id, i * 10, yesterday + i * 10)
+    # A gap longer than PROGRESS_MAX_GAP_SECONDS is not watch time
+    db.record_progress_event(notebook_id, 200, yesterday + 5000)
+    for i in range(4):
+        db.record_progress_event(notebook_id, 300 + i * 10, yesterday + DAY + i * 10)
+
+    before = db.get_daily_progress().sort_values("day")
+    assert before["seconds_watched"].astype(int).tolist() == [90, 30]
+
+    assert db.rollup_progress_events(yesterday + DAY) == 11
+    assert db.rollup_progress_events(yesterday + DAY) == 0
+
+    after = db.get_daily_progress().sort_values("day")
+    assert after["seconds_watched"].astype(int).tolist() == [90, 30]
+    assert after["max_position"].astype(int).tolist() == [200, 330]
+
+
+def test_video_duration_cache(db):
+    assert db.get_video_duration("u") is None
+    db.save_video_duration("u", 100.4)
+    db.save_video_duration("u", 80)
+    assert db.get_video_duration("u") == 80
+
+
+def test_collection_stats_include_sub_collections(db):
+    parent = db.create_collection("A")
+    child = db.create_collection("B", parent)
+    done = db.create_notebook("done", "u1", child)
+    db.create_notebook("loose", "u2")
+    db.save_video_duration("u1", 100)
+    db.update_notes(done, "", 95)
+
+    collections = db.get_collections()
+    stats = compute_library_stats(
+        db.get_daily_progress(),
+        db.get_notebook_durations(),
+        dict(zip(collections["id"], collections["path"])),
+        db.get_collection_ancestors(),
+    )
+    per_collection = stats["collections"].set_index("collection")
+    assert per_collection.loc["A", "completed"] == 1
+    assert per_collection.loc["A / B", "completed"] == 1
+    assert per_collection.loc["No collection", "notebooks"] == 1
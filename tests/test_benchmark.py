@@ -0,0 +1,62 @@
+"""Small timed benchmark of the hot paths, run against every backend.
+
+The limits are generous; they catch accidental full scans or per-row round
+trips, not small regressions. Run with `-s` to see the timings.
+"""
+
+import time
+
+import pytest
+
+
+NOTEBOOKS = 500
+EVENTS_PER_NOTEBOOK = 20
+
+
+@pytest.mark.benchmark
+def test_benchmark(db, backend):
+    timings = {}
+
+    start = time.perf_counter()
+    with backend.connect() as conn:
+        backend.executemany(
+            conn,
+            "INSERT INTO notebooks (title, video_url, notes, progress_time_seconds, last_opened_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            [(f"nb{i:04d}", f"u{i}", "", i) for i in range(NOTEBOOKS)],
+        )
+        backend.executemany(
+            conn,
+            "INSERT INTO progress_events (notebook_id, ts, position) VALUES (?, ?, ?)",
+            [
+                (notebook_id, 1_000_000 + i * 10, i * 10)
+                for notebook_id in range(1, NOTEBOOKS + 1)
+                for i in range(EVENTS_PER_NOTEBOOK)
+            ],
+        )
+    timings["insert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    seen, cursor = 0, None
+    while True:
+        page, cursor = db.list_notebooks(sort="title", after=cursor, limit=50)
+        seen += len(page)
+        if cursor is None:
+            break
+    timings["page through library"] = time.perf_counter() - start
+    assert seen == NOTEBOOKS
+
+    start = time.perf_counter()
+    rolled = db.rollup_progress_events(2_000_000)
+    timings["rollup"] = time.perf_counter() - start
+    assert rolled == NOTEBOOKS * EVENTS_PER_NOTEBOOK
+
+    start = time.perf_counter()
+    daily = db.get_daily_progress()
+    timings["daily progress"] = time.perf_counter() - start
+    assert len(daily) == NOTEBOOKS
+
+    print()
+    for name, seconds in timings.items():
+        print(f"[{backend.name}] {name}: {seconds * 1000:.1f} ms")
+        assert seconds < 10
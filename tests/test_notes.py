@@ -0,0 +1,51 @@
+from main.notes import content_hash, process_notes
+
+
+def test_self_closing_dropped_tag_keeps_following_content():
+    for tag in ("style", "script", "iframe"):
+        processed = process_notes(f"<p>a</p><{tag}/><p>important notes</p>")
+        assert processed.html == "<p>a</p><p>important notes</p>"
+        assert "important notes" in processed.text
+
+
+def test_dropped_tag_content_is_removed():
+    processed = process_notes("<p>keep</p><script>alert(1)</script><p>after</p>")
+    assert processed.html == "<p>keep</p><p>after</p>"
+    assert processed.text == "keep\nafter"
+
+
+def test_unsafe_attributes_and_urls_are_stripped():
+    processed = process_notes(
+        '<p><a href="javascript:x" onclick="y">bad</a> <a href="#t=42">[00:42]</a></p>'
+    )
+    assert processed.html == '<p><a>bad</a> <a href="#t=42">[00:42]</a></p>'
+
+
+def test_styles_are_limited_to_quill_properties():
+    processed = process_notes(
+        '<p style="text-align: center; position: fixed">'
+        '<span style="color: rgb(230, 0, 0); background-image: url(http://x/a.png)">red</span>'
+        '<span style="background-color: url(file:///etc/passwd)">bg</span></p>'
+    )
+    assert processed.html == (
+        '<p style="text-align: center"><span style="color: rgb(230, 0, 0)">red</span>'
+        "<span>bg</span></p>"
+    )
+
+
+def test_implied_end_tags_and_empty_paragraphs_are_normalized():
+    processed = process_notes(
+        "<p><br></p><ul><li>one<li>two<ul><li>n</ul></ul><p>line<br>break<p><br></p>"
+    )
+    assert processed.html == (
+        "<ul><li>one</li><li>two<ul><li>n</li></ul></li></ul><p>line<br>break</p>"
+    )
+    assert processed.text == "one\ntwo\nn\n\nline\nbreak"
+    assert processed.word_count == 5
+
+
+def test_empty_notes():
+    processed = process_notes("<p><br></p>")
+    assert processed.html == processed.text == processed.markdown == ""
+    assert processed.word_count == 0
+    assert processed.content_hash == content_hash("<p><br></p>")